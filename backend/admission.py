@@ -0,0 +1,130 @@
+import asyncio
+import math
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from database import QueryScope, set_query_scope
+
+# Per route class: concurrent slots, how many requests may wait for a slot,
+# how long they may wait, and the total deadline for the request's queries.
+# Long streams use no total deadline and bound each statement instead, so a
+# large response is never cut off after its headers have been sent.
+ROUTE_CLASSES = {
+    "lookup": {"max_concurrent": 16, "max_queue": 64, "queue_timeout": 2.0, "deadline": 5.0},
+    "aggregate": {"max_concurrent": 4, "max_queue": 16, "queue_timeout": 5.0, "deadline": 15.0},
+    "export": {"max_concurrent": 2, "max_queue": 4, "queue_timeout": 10.0, "deadline": 60.0},
+    "sync": {"max_concurrent": 2, "max_queue": 4, "queue_timeout": 10.0, "deadline": None, "statement_timeout": 30.0},
+}
+
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+class AdmissionGate:
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+        deadline: Optional[float],
+        statement_timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+        self.statement_timeout = statement_timeout
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def _retry_after(self) -> str:
+        return str(max(1, math.ceil(self.queue_timeout)))
+
+    async def acquire(self):
+        if self.semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail=f"Too many concurrent {self.name} requests",
+                headers={"Retry-After": self._retry_after()}
+            )
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail=f"Server busy with {self.name} requests",
+                headers={"Retry-After": self._retry_after()}
+            )
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+
+    def release(self):
+        self.active -= 1
+        self.semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+
+GATES = {name: AdmissionGate(name, **config) for name, config in ROUTE_CLASSES.items()}
+
+
+async def _watch_request(request: Request, scope: QueryScope):
+    """Cancel in-flight statements once the client goes away or the deadline passes."""
+    while True:
+        if scope.remaining() <= 0 or await request.is_disconnected():
+            scope.cancel()
+            return
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+def admit(route_class: str):
+    """Dependency that admits a request into its route class or sheds it with 429/503."""
+    gate = GATES[route_class]
+
+    async def dependency(request: Request):
+        started = time.monotonic()
+        await gate.acquire()
+
+        # Time spent queueing counts against the deadline.
+        deadline = started + gate.deadline if gate.deadline is not None else None
+        scope = QueryScope(deadline, gate.statement_timeout)
+        set_query_scope(scope)
+        watcher = asyncio.create_task(_watch_request(request, scope))
+        try:
+            yield scope
+        finally:
+            watcher.cancel()
+            gate.release()
+
+    return dependency
+
+
+def gate_stats() -> Dict[str, Any]:
+    return {name: gate.stats() for name, gate in GATES.items()}
@@ -1,6 +1,13 @@
 import psycopg2
+from psycopg2.extensions import QueryCanceledError
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import HTTPException
+from typing import Optional
+import math
+import threading
+import time
 
 DB_CONFIG = {
     "host": "localhost",
@@ -10,21 +17,95 @@ DB_CONFIG = {
     "password": "Craigers31!"
 }
 
+class QueryScope:
+    """Deadline and open connections for one request, so its statements can be cancelled.
+
+    A scope without a deadline only limits each statement to statement_timeout seconds.
+    """
+
+    def __init__(self, deadline: Optional[float], statement_timeout: Optional[float] = None):
+        self.deadline = deadline
+        self.statement_timeout = statement_timeout
+        self.cancelled = False
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        if self.deadline is None:
+            return math.inf
+        return self.deadline - time.monotonic()
+
+    def statement_timeout_ms(self) -> int:
+        timeout = self.remaining()
+        if self.statement_timeout is not None:
+            timeout = min(timeout, self.statement_timeout)
+        return max(1, int(timeout * 1000))
+
+    def attach(self, conn):
+        with self._lock:
+            self._connections.add(conn)
+            cancelled = self.cancelled
+        if cancelled:
+            conn.cancel()
+
+    def detach(self, conn):
+        with self._lock:
+            self._connections.discard(conn)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            connections = list(self._connections)
+        for conn in connections:
+            try:
+                conn.cancel()
+            except psycopg2.Error:
+                pass
+
+_query_scope = ContextVar("query_scope", default=None)
+
+def set_query_scope(scope):
+    _query_scope.set(scope)
+
+def _deadline_exceeded():
+    return HTTPException(
+        status_code=503,
+        detail="Request cancelled or deadline exceeded",
+        headers={"Retry-After": "1"}
+    )
+
 def get_connection():
     return psycopg2.connect(**DB_CONFIG)
 
 @contextmanager
 def get_cursor():
+    scope = _query_scope.get()
+    if scope is not None and (scope.cancelled or scope.remaining() <= 0):
+        raise _deadline_exceeded()
+
     conn = get_connection()
+    cursor = None
+    if scope is not None:
+        scope.attach(conn)
     try:
         cursor = conn.cursor(cursor_factory=RealDictCursor)
+        if scope is not None:
+            cursor.execute("SET LOCAL statement_timeout = %s", (scope.statement_timeout_ms(),))
         yield cursor
         conn.commit()
+    except QueryCanceledError:
+        conn.rollback()
+        if scope is None:
+            raise
+        raise _deadline_exceeded()
     except Exception as e:
         conn.rollback()
         raise e
     finally:
-        cursor.close()
+        if scope is not None:
+            scope.detach(conn)
+        if cursor is not None:
+            cursor.close()
         conn.close()
 
 def test_connection():
@@ -1,11 +1,11 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
 from routers import insights, medicines, export
 from database import test_connection
+import static_assets
+import admission
 
 app = FastAPI(
     title="Medicine Data Visualization System",
@@ -22,17 +22,27 @@ app.add_middleware(
 )
 
 frontend_path = os.path.join(os.path.dirname(__file__), "..", "frontend")
-app.mount("/css", StaticFiles(directory=os.path.join(frontend_path, "css")), name="css")
-app.mount("/js", StaticFiles(directory=os.path.join(frontend_path, "js")), name="js")
+
+@app.on_event("startup")
+def build_static_assets():
+    static_assets.build_assets(frontend_path)
+
+@app.get("/css/{filename}", include_in_schema=False)
+async def serve_css(filename: str, request: Request):
+    return static_assets.asset_response(f"/css/{filename}", request)
+
+@app.get("/js/{filename}", include_in_schema=False)
+async def serve_js(filename: str, request: Request):
+    return static_assets.asset_response(f"/js/{filename}", request)
 
 app.include_router(insights.router, prefix="/api/insights", tags=["Insights - Craig"])
 app.include_router(medicines.router, prefix="/api/medicines", tags=["Medicines - Rhea"])
 app.include_router(export.router, prefix="/api/export", tags=["Export - Kavish"])
 
-@app.get("/", response_class=FileResponse)
-async def serve_index():
-    return FileResponse(os.path.join(frontend_path, "index.html"))
+@app.get("/", include_in_schema=False)
+async def serve_index(request: Request):
+    return static_assets.index_response(request)
 
 @app.get("/health")
 async def health_check():
-    return {"api": "healthy", "database": test_connection()}
\ No newline at end of file
+    return {"api": "healthy", "database": test_connection(), "admission": admission.gate_stats()}
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""Versioned schema migrations.
+
+Migrations live in backend/migrations as NNNN_description.sql and are applied
+in version order, each recorded in schema_migrations. A file whose first line
+is `-- migrate: no-transaction` runs statement by statement in autocommit mode,
+which CREATE INDEX CONCURRENTLY requires.
+
+Usage:
+    python migrate.py            # apply pending migrations
+    python migrate.py --status   # list applied and pending migrations
+"""
+import argparse
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+from database import get_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+# Arbitrary key so two runners never apply migrations at the same time.
+MIGRATION_LOCK_ID = 412043
+
+_FILENAME_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+_CONCURRENT_INDEX_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE
+)
+
+
+def discover_migrations() -> List[Dict]:
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = _FILENAME_RE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename), "r", encoding="utf-8") as f:
+            sql = f.read()
+        migrations.append({
+            "version": int(match.group(1)),
+            "name": match.group(2),
+            "sql": sql,
+            "transactional": not sql.lstrip().startswith(NO_TRANSACTION_MARKER),
+        })
+
+    versions = [m["version"] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Duplicate migration version in " + MIGRATIONS_DIR)
+    return migrations
+
+
+def _split_statements(sql: str) -> List[str]:
+    """Split a no-transaction migration into statements. Such files must not contain function bodies."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def _ensure_migrations_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def applied_versions(cur) -> Dict[int, str]:
+    cur.execute("SELECT version, applied_at FROM schema_migrations ORDER BY version")
+    return {version: applied_at for version, applied_at in cur.fetchall()}
+
+
+def _drop_invalid_index(cur, index_name: str):
+    # A failed CONCURRENTLY build leaves an INVALID index behind, which
+    # IF NOT EXISTS would then silently keep.
+    cur.execute("""
+        SELECT 1 FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = %s AND NOT i.indisvalid
+    """, (index_name,))
+    if cur.fetchone():
+        cur.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"')
+
+
+def _apply(conn, migration: Dict):
+    if migration["transactional"]:
+        conn.autocommit = False
+        with conn.cursor() as cur:
+            cur.execute(migration["sql"])
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (migration["version"], migration["name"])
+            )
+        conn.commit()
+        return
+
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for statement in _split_statements(migration["sql"]):
+            match = _CONCURRENT_INDEX_RE.search(statement)
+            if match:
+                _drop_invalid_index(cur, match.group(1))
+            cur.execute(statement)
+        cur.execute(
+            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+            (migration["version"], migration["name"])
+        )
+
+
+def migrate(target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to target (all by default). Returns the versions applied."""
+    migrations = discover_migrations()
+    applied = []
+
+    conn = get_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+            _ensure_migrations_table(cur)
+            done = applied_versions(cur)
+
+        for migration in migrations:
+            if migration["version"] in done:
+                continue
+            if target is not None and migration["version"] > target:
+                break
+            print(f"Applying {migration['version']:04d}_{migration['name']}")
+            _apply(conn, migration)
+            applied.append(migration["version"])
+    finally:
+        if not conn.closed:
+            conn.rollback()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            conn.close()
+
+    return applied
+
+
+def status() -> List[Dict]:
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            _ensure_migrations_table(cur)
+            done = applied_versions(cur)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return [
+        {"version": m["version"], "name": m["name"], "applied_at": done.get(m["version"])}
+        for m in discover_migrations()
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply MDVS schema migrations.")
+    parser.add_argument("--status", action="store_true", help="show applied and pending migrations")
+    parser.add_argument("--target", type=int, help="stop after this migration version")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        for row in status():
+            state = row["applied_at"].isoformat() if row["applied_at"] else "pending"
+            print(f"{row['version']:04d}_{row['name']}: {state}")
+        return 0
+
+    applied = migrate(args.target)
+    if not applied:
+        print("Database is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+-- Baseline MDVS schema. Uses IF NOT EXISTS so databases created before
+-- migrations existed are adopted as-is.
+
+CREATE TABLE IF NOT EXISTS category (
+    category_id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS manufacturer (
+    manufacturer_id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS ingredient (
+    ingredient_id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS medicine (
+    medicine_id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    strength VARCHAR(100),
+    category_id INTEGER NOT NULL REFERENCES category (category_id),
+    manufacturer_id INTEGER NOT NULL REFERENCES manufacturer (manufacturer_id),
+    dosage_form VARCHAR(100),
+    indication TEXT,
+    classification VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS medicine_ingredient (
+    medicine_id INTEGER NOT NULL REFERENCES medicine (medicine_id),
+    ingredient_id INTEGER NOT NULL REFERENCES ingredient (ingredient_id),
+    strength VARCHAR(100),
+    PRIMARY KEY (medicine_id, ingredient_id)
+);
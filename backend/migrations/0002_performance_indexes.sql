@@ -0,0 +1,19 @@
+-- migrate: no-transaction
+-- Indexes the router queries rely on. Built CONCURRENTLY so a live catalog
+-- keeps serving reads and writes while they are created.
+
+-- Join keys from medicine to its category and manufacturer.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medicine_category_id_idx ON medicine (category_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medicine_manufacturer_id_idx ON medicine (manufacturer_id);
+
+-- ORDER BY m.name LIMIT n, with medicine_id carried along for the joins.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medicine_name_medicine_id_idx ON medicine (name, medicine_id);
+
+-- The reverse join from medicine_ingredient to ingredient. Lookups by
+-- medicine_id are already served by the (medicine_id, ingredient_id) primary key.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medicine_ingredient_ingredient_id_idx ON medicine_ingredient (ingredient_id);
+
+-- WHERE c.name = %s / man.name = %s. These match the names of the UNIQUE
+-- constraints from the baseline schema, so existing databases skip them.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS category_name_key ON category (name);
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS manufacturer_name_key ON manufacturer (name);
@@ -0,0 +1,7 @@
+-- migrate: no-transaction
+-- Trigram indexes for the ILIKE '%term%' searches on medicine name and indication.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medicine_name_trgm_idx ON medicine USING gin (name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medicine_indication_trgm_idx ON medicine USING gin (indication gin_trgm_ops);
@@ -0,0 +1,48 @@
+-- Change log for incremental sync. Every insert, update and delete on
+-- medicine (and on its ingredient rows) appends a row with a new version.
+-- The trigger takes a transaction-scoped advisory lock before drawing the
+-- version, so versions become visible in commit order and a consumer that
+-- reads "since N" never skips a change committed later with a lower number.
+
+CREATE TABLE IF NOT EXISTS medicine_change (
+    version BIGSERIAL PRIMARY KEY,
+    medicine_id INTEGER NOT NULL,
+    operation VARCHAR(6) NOT NULL CHECK (operation IN ('INSERT', 'UPDATE', 'DELETE')),
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS medicine_change_medicine_id_version_idx ON medicine_change (medicine_id, version);
+
+CREATE OR REPLACE FUNCTION record_medicine_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(412044);
+
+    IF TG_TABLE_NAME = 'medicine' THEN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO medicine_change (medicine_id, operation) VALUES (OLD.medicine_id, 'DELETE');
+        ELSE
+            INSERT INTO medicine_change (medicine_id, operation) VALUES (NEW.medicine_id, TG_OP);
+        END IF;
+    ELSE
+        -- Ingredient edits change the medicine as seen by consumers.
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO medicine_change (medicine_id, operation) VALUES (OLD.medicine_id, 'UPDATE');
+        END IF;
+        IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.medicine_id <> OLD.medicine_id) THEN
+            INSERT INTO medicine_change (medicine_id, operation) VALUES (NEW.medicine_id, 'UPDATE');
+        END IF;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS medicine_change_trg ON medicine;
+CREATE TRIGGER medicine_change_trg
+    AFTER INSERT OR UPDATE OR DELETE ON medicine
+    FOR EACH ROW EXECUTE FUNCTION record_medicine_change();
+
+DROP TRIGGER IF EXISTS medicine_ingredient_change_trg ON medicine_ingredient;
+CREATE TRIGGER medicine_ingredient_change_trg
+    AFTER INSERT OR UPDATE OR DELETE ON medicine_ingredient
+    FOR EACH ROW EXECUTE FUNCTION record_medicine_change();
@@ -0,0 +1,8 @@
+-- Numeric strength in a canonical unit, filled from the free-text strength
+-- by the application and by `python strength.py --backfill`.
+
+ALTER TABLE medicine ADD COLUMN IF NOT EXISTS strength_value NUMERIC;
+ALTER TABLE medicine ADD COLUMN IF NOT EXISTS strength_unit VARCHAR(16);
+
+ALTER TABLE medicine_ingredient ADD COLUMN IF NOT EXISTS strength_value NUMERIC;
+ALTER TABLE medicine_ingredient ADD COLUMN IF NOT EXISTS strength_unit VARCHAR(16);
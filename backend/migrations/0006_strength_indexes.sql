@@ -0,0 +1,4 @@
+-- migrate: no-transaction
+-- Dose-range filters compare strength_value within one canonical unit.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medicine_strength_unit_value_idx ON medicine (strength_unit, strength_value);
@@ -0,0 +1,56 @@
+-- The change feed carries category, manufacturer and ingredient names, so
+-- renaming one of them changes every medicine that refers to it. Log an
+-- UPDATE for each affected medicine, once per statement, under the same
+-- advisory lock as record_medicine_change() so versions stay in commit order.
+
+CREATE OR REPLACE FUNCTION record_lookup_rename() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(412044);
+
+    IF TG_TABLE_NAME = 'category' THEN
+        INSERT INTO medicine_change (medicine_id, operation)
+        SELECT m.medicine_id, 'UPDATE'
+        FROM old_rows o
+        JOIN new_rows n ON n.category_id = o.category_id
+        JOIN medicine m ON m.category_id = n.category_id
+        WHERE n.name IS DISTINCT FROM o.name
+        ORDER BY m.medicine_id;
+    ELSIF TG_TABLE_NAME = 'manufacturer' THEN
+        INSERT INTO medicine_change (medicine_id, operation)
+        SELECT m.medicine_id, 'UPDATE'
+        FROM old_rows o
+        JOIN new_rows n ON n.manufacturer_id = o.manufacturer_id
+        JOIN medicine m ON m.manufacturer_id = n.manufacturer_id
+        WHERE n.name IS DISTINCT FROM o.name
+        ORDER BY m.medicine_id;
+    ELSE
+        INSERT INTO medicine_change (medicine_id, operation)
+        SELECT DISTINCT mi.medicine_id, 'UPDATE'
+        FROM old_rows o
+        JOIN new_rows n ON n.ingredient_id = o.ingredient_id
+        JOIN medicine_ingredient mi ON mi.ingredient_id = n.ingredient_id
+        WHERE n.name IS DISTINCT FROM o.name
+        ORDER BY mi.medicine_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS category_rename_change_trg ON category;
+CREATE TRIGGER category_rename_change_trg
+    AFTER UPDATE ON category
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_lookup_rename();
+
+DROP TRIGGER IF EXISTS manufacturer_rename_change_trg ON manufacturer;
+CREATE TRIGGER manufacturer_rename_change_trg
+    AFTER UPDATE ON manufacturer
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_lookup_rename();
+
+DROP TRIGGER IF EXISTS ingredient_rename_change_trg ON ingredient;
+CREATE TRIGGER ingredient_rename_change_trg
+    AFTER UPDATE ON ingredient
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_lookup_rename();
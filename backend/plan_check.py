@@ -0,0 +1,228 @@
+"""Query plan regression helpers.
+
+Runs every router query against a local Postgres, EXPLAINs each statement as it
+is executed and reports any plan that sequentially scans a large table, unless
+the endpoint reads the whole table by design. tests/test_query_plans.py drives
+these against a seeded database.
+"""
+from contextlib import contextmanager
+from typing import Dict, List
+
+from psycopg2.extras import RealDictCursor
+
+from database import get_connection
+import report_cache
+from routers import export, insights, medicines
+
+# Endpoints that aggregate over the whole catalog, where a sequential scan is
+# the correct plan.
+FULL_SCAN_ALLOWED = {
+    "insights.get_category_distribution",
+    "insights.get_category_by_classification",
+    "insights.get_manufacturer_ranking",
+    "insights.get_insights_overview",
+    "medicines.get_filter_options",
+    "export.get_filtered_medicines[all]",
+}
+
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+class _ExplainingCursor:
+    """Cursor wrapper that records the plan of each statement before running it."""
+
+    def __init__(self, cursor, plans: List[Dict]):
+        self._cursor = cursor
+        self._plans = plans
+
+    def execute(self, sql, params=None):
+        if sql.lstrip().upper().startswith(EXPLAINABLE):
+            self._cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = self._cursor.fetchone()["QUERY PLAN"][0]["Plan"]
+            self._plans.append({"sql": " ".join(sql.split()), "plan": plan})
+        return self._cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _explaining_get_cursor(plans: List[Dict]):
+    @contextmanager
+    def get_cursor():
+        conn = get_connection()
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            yield _ExplainingCursor(cursor, plans)
+        finally:
+            # Never keep writes made by the CRUD cases.
+            conn.rollback()
+            cursor.close()
+            conn.close()
+    return get_cursor
+
+
+def seed(medicine_count: int):
+    """Insert synthetic catalog rows and refresh planner statistics."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO category (name, description)
+                SELECT 'Seed Category ' || g, 'Synthetic category ' || g FROM generate_series(1, 200) g
+                ON CONFLICT (name) DO NOTHING
+            """)
+            cur.execute("""
+                INSERT INTO manufacturer (name)
+                SELECT 'Seed Manufacturer ' || g FROM generate_series(1, 500) g
+                ON CONFLICT (name) DO NOTHING
+            """)
+            cur.execute("""
+                INSERT INTO ingredient (name)
+                SELECT 'Seed Ingredient ' || g FROM generate_series(1, 2000) g
+                ON CONFLICT (name) DO NOTHING
+            """)
+            cur.execute("""
+                WITH ids AS (
+                    SELECT
+                        (SELECT array_agg(category_id) FROM category) AS categories,
+                        (SELECT array_agg(manufacturer_id) FROM manufacturer) AS manufacturers
+                )
+                INSERT INTO medicine (name, strength, strength_value, strength_unit, category_id, manufacturer_id, dosage_form, indication, classification)
+                SELECT
+                    'Seed Medicine ' || g,
+                    ((g %% 20 + 1) * 25) || ' mg',
+                    (g %% 20 + 1) * 25,
+                    'mg',
+                    categories[1 + g %% array_length(categories, 1)],
+                    manufacturers[1 + g %% array_length(manufacturers, 1)],
+                    (ARRAY['Tablet', 'Capsule', 'Syrup', 'Injection'])[1 + g %% 4],
+                    'Synthetic indication ' || (g %% 1000),
+                    (ARRAY['Prescription', 'Over-the-Counter'])[1 + g %% 2]
+                FROM ids, generate_series(1, %s) g
+            """, (medicine_count,))
+            cur.execute("""
+                INSERT INTO medicine_ingredient (medicine_id, ingredient_id, strength, strength_value, strength_unit)
+                SELECT m.medicine_id, i.ingredient_id, ((m.medicine_id % 10 + 1) * 50) || ' mg', (m.medicine_id % 10 + 1) * 50, 'mg'
+                FROM medicine m
+                JOIN ingredient i ON i.name = 'Seed Ingredient ' || (1 + m.medicine_id % 2000)
+                WHERE m.name LIKE 'Seed Medicine %'
+                ON CONFLICT DO NOTHING
+            """)
+        conn.commit()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+def _sample_values() -> Dict:
+    conn = get_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                SELECT m.medicine_id, m.name, m.category_id, m.manufacturer_id,
+                       c.name AS category, man.name AS manufacturer
+                FROM medicine m
+                JOIN category c ON c.category_id = m.category_id
+                JOIN manufacturer man ON man.manufacturer_id = m.manufacturer_id
+                ORDER BY m.medicine_id
+                LIMIT 1
+            """)
+            row = cur.fetchone()
+        conn.rollback()
+    finally:
+        conn.close()
+    if row is None:
+        raise RuntimeError("No medicines found; call seed() first")
+    return row
+
+
+def _cases(sample: Dict):
+    new_medicine = medicines.MedicineCreate(
+        name="Plan Check Medicine", strength="10 mg",
+        category_id=sample["category_id"], manufacturer_id=sample["manufacturer_id"]
+    )
+    return [
+        ("insights.get_category_distribution", lambda: insights.get_category_distribution()),
+        ("insights.get_category_by_classification", lambda: insights.get_category_by_classification()),
+        ("insights.get_category_details", lambda: insights.get_category_details(sample["category"])),
+        ("insights.get_manufacturer_ranking", lambda: insights.get_manufacturer_ranking(10)),
+        ("insights.get_manufacturer_details", lambda: insights.get_manufacturer_details(sample["manufacturer"])),
+        ("insights.get_insights_overview", lambda: insights.get_insights_overview()),
+        ("medicines.search_medicines", lambda: medicines.search_medicines(
+            q=sample["name"], manufacturer=None, category=None,
+            min_strength=None, max_strength=None, unit=None, limit=50)),
+        ("medicines.search_medicines[browse]", lambda: medicines.search_medicines(
+            q=None, manufacturer=None, category=None,
+            min_strength=None, max_strength=None, unit=None, limit=50)),
+        ("medicines.search_medicines[dose]", lambda: medicines.search_medicines(
+            q=None, manufacturer=None, category=None, min_strength=100, max_strength=150, unit="mg", limit=50)),
+        ("medicines.get_filter_options", lambda: medicines.get_filter_options()),
+        ("medicines.get_all_medicines", lambda: medicines.get_all_medicines(limit=1000)),
+        ("medicines.iter_changes", lambda: list(medicines.iter_changes(
+            0, medicines.current_change_version(), 1000))),
+        ("medicines.get_medicine", lambda: medicines.get_medicine(sample["medicine_id"])),
+        ("medicines.create_medicine", lambda: medicines.create_medicine(new_medicine)),
+        ("medicines.update_medicine", lambda: medicines.update_medicine(
+            sample["medicine_id"], medicines.MedicineUpdate(indication="Plan check"))),
+        ("medicines.delete_medicine", lambda: medicines.delete_medicine(sample["medicine_id"])),
+        ("export.get_filtered_medicines[all]", lambda: export.get_filtered_medicines({})),
+        ("export.get_filtered_medicines", lambda: export.get_filtered_medicines({"q": sample["name"]})),
+        ("export.get_filtered_medicines[dose]", lambda: export.get_filtered_medicines(
+            {"min_strength": 0.1, "max_strength": 0.15, "unit": "g"})),
+        ("report_cache.catalog_version", lambda: report_cache.catalog_version()),
+    ]
+
+
+def _seq_scans(plan: Dict, large_tables) -> List[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in large_tables:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child, large_tables))
+    return found
+
+
+def _large_tables(min_rows: int):
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT relname FROM pg_class
+                WHERE relkind = 'r'
+                  AND relnamespace = 'public'::regnamespace
+                  AND reltuples >= %s
+            """, (min_rows,))
+            return {row[0] for row in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def check(min_rows: int) -> List[Dict]:
+    """Run every case and return the statements that seq scan a large table."""
+    large_tables = _large_tables(min_rows)
+    violations = []
+
+    for name, run in _cases(_sample_values()):
+        plans = []
+        patched = _explaining_get_cursor(plans)
+        modules = (insights, medicines, export, report_cache)
+        originals = [module.get_cursor for module in modules]
+        for module in modules:
+            module.get_cursor = patched
+        try:
+            run()
+        finally:
+            for module, original in zip(modules, originals):
+                module.get_cursor = original
+
+        if name in FULL_SCAN_ALLOWED:
+            continue
+        for entry in plans:
+            tables = _seq_scans(entry["plan"], large_tables)
+            if tables:
+                violations.append({"case": name, "tables": sorted(set(tables)), "sql": entry["sql"]})
+
+    return violations
+
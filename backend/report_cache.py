@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+REPORT_CACHE_CONFIG = {
+    "directory": os.path.join(os.path.dirname(__file__), ".report_cache"),
+    "max_bytes": 256 * 1024 * 1024,
+}
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+
+def _cache_dir():
+    directory = REPORT_CACHE_CONFIG["directory"]
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Drop empty filter values and trim strings so equivalent requests share a key."""
+    normalized = {}
+    for key, value in (filters or {}).items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, "", [], {}):
+            continue
+        normalized[key] = value
+    return normalized
+
+
+def catalog_version() -> str:
+    """Version of the catalog rows that feed a report.
+
+    Medicine edits are tracked by the medicine_change log; the small category
+    and manufacturer tables are fingerprinted directly.
+    """
+    from database import get_cursor
+
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT
+                (SELECT COALESCE(MAX(version), 0) FROM medicine_change) AS medicine_version,
+                md5(
+                    COALESCE((SELECT string_agg(md5(c::text), '' ORDER BY c.category_id) FROM category c), '') ||
+                    COALESCE((SELECT string_agg(md5(ma::text), '' ORDER BY ma.manufacturer_id) FROM manufacturer ma), '')
+                ) AS lookup_version
+        """)
+        row = cur.fetchone()
+        return f"{row['medicine_version']}:{row['lookup_version']}"
+
+
+def report_key(
+    filters: Optional[Dict[str, Any]],
+    include_details: bool,
+    include_charts: bool,
+    chart_images: Optional[List[str]],
+    data_version: str
+) -> str:
+    """Content address for a report built from these inputs."""
+    payload = json.dumps({
+        "filters": normalize_filters(filters),
+        "include_details": include_details,
+        "include_charts": include_charts,
+        "chart_images": chart_images or [],
+        "data_version": data_version,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def report_path(key: str) -> str:
+    return os.path.join(_cache_dir(), f"{key}.pdf")
+
+
+def get_report(key: str) -> Optional[BinaryIO]:
+    """Open the cached report for key, marking it as recently used.
+
+    The file is opened while holding the lock so a concurrent eviction cannot
+    remove it between the lookup and the read.
+    """
+    path = report_path(key)
+    with _lock:
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            _stats["misses"] += 1
+            return None
+        os.utime(path)
+        _stats["hits"] += 1
+        return f
+
+
+def store_report(key: str, content: bytes) -> BinaryIO:
+    """Write a report atomically, evict least recently used entries over the size limit and open it."""
+    path = report_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+    with _lock:
+        _stats["stores"] += 1
+        _evict(keep=path)
+        return open(path, "rb")
+
+
+def _entries():
+    directory = _cache_dir()
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(".pdf"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+
+def _evict(keep: str):
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= REPORT_CACHE_CONFIG["max_bytes"]:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        _stats["evictions"] += 1
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=start-end` range against a file of size bytes.
+
+    Returns None when the header should be ignored and the whole file served:
+    malformed headers and multi-range requests, which are not supported.
+    Raises ValueError when the range is well formed but unsatisfiable.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    if match.group(1) == "":
+        length = int(match.group(2))
+        if length == 0 or size == 0:
+            raise ValueError("Requested range not satisfiable")
+        return max(size - length, 0), size - 1
+    start = int(match.group(1))
+    if match.group(2) and int(match.group(2)) < start:
+        return None
+    if start >= size:
+        raise ValueError("Requested range not satisfiable")
+    end = int(match.group(2)) if match.group(2) else size - 1
+    return start, min(end, size - 1)
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _lock:
+        entries = _entries()
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": REPORT_CACHE_CONFIG["max_bytes"],
+        }
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Query, HTTPException
-from fastapi.responses import StreamingResponse
-from typing import Optional, Dict, Any, List
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional, Dict, Any, List, Tuple, BinaryIO
 from datetime import datetime
 from database import get_cursor
+from admission import admit
+import report_cache
+from strength import strength_range, strength_range_sql
 import io
+import os
+import re
 
 router = APIRouter()
 
@@ -25,6 +31,11 @@ def get_filtered_medicines(filters: Dict[str, Any] = None):
         if filters.get("classification"):
             where.append("m.classification = %(classification)s")
             params["classification"] = filters["classification"]
+        try:
+            bounds = strength_range(filters.get("min_strength"), filters.get("max_strength"), filters.get("unit"))
+            where.extend(strength_range_sql("m", bounds, params))
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid strength filter: {str(e)}")
     
     where_sql = "WHERE " + " AND ".join(where) if where else ""
     
@@ -80,163 +91,259 @@ def generate_statistics(medicines: List[Dict], filters: Dict[str, Any]) -> Dict[
         "top_5_manufacturers": sorted(manufacturers.items(), key=lambda x: x[1], reverse=True)[:5]
     }
 
-@router.post("/pdf")
-async def export_to_pdf(
-    filters: Dict[str, Any] = {},
-    include_details: bool = Query(False),
-    include_charts: bool = Query(True),
-    chart_images: Optional[List[str]] = None
-):
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib.enums import TA_CENTER
-        
-        medicines = get_filtered_medicines(filters)
-        statistics = generate_statistics(medicines, filters)
-        
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-        
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1f4788'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#1f4788'),
-            spaceAfter=12,
-            spaceBefore=12
-        )
-        
-        elements.append(Paragraph("Medicine Data Export Report", title_style))
-        elements.append(Spacer(1, 12))
+def build_pdf_report(medicines: List[Dict], statistics: Dict[str, Any], filters: Dict[str, Any]) -> bytes:
+    """Render the export report to PDF bytes."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib.enums import TA_CENTER
+    
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1f4788'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#1f4788'),
+        spaceAfter=12,
+        spaceBefore=12
+    )
+    
+    elements.append(Paragraph("Medicine Data Export Report", title_style))
+    elements.append(Spacer(1, 12))
+    
+    filter_text = "None"
+    if filters:
+        active_filters = [f"{k}: {v}" for k, v in filters.items() if v]
+        if active_filters:
+            filter_text = ", ".join(active_filters)
+    
+    info_text = f"""
+    <b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>
+    <b>Total Medicines:</b> {statistics['total_medicines']}<br/>
+    <b>Filters Applied:</b> {filter_text}
+    """
+    elements.append(Paragraph(info_text, styles['Normal']))
+    elements.append(Spacer(1, 20))
+    
+    elements.append(Paragraph("Summary Statistics", heading_style))
+    elements.append(Spacer(1, 12))
+    
+    if statistics['top_5_categories']:
+        elements.append(Paragraph("<b>Top 5 Categories</b>", styles['Heading3']))
+        cat_data = [['Category', 'Count']]
+        cat_data.extend(statistics['top_5_categories'])
         
-        filter_text = "None"
-        if filters:
-            active_filters = [f"{k}: {v}" for k, v in filters.items() if v]
-            if active_filters:
-                filter_text = ", ".join(active_filters)
+        cat_table = Table(cat_data, colWidths=[4*inch, 1.5*inch])
+        cat_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        elements.append(cat_table)
+        elements.append(Spacer(1, 20))
+    
+    if statistics['top_5_manufacturers']:
+        elements.append(Paragraph("<b>Top 5 Manufacturers</b>", styles['Heading3']))
+        mfr_data = [['Manufacturer', 'Medicines Count']]
+        mfr_data.extend(statistics['top_5_manufacturers'])
         
-        info_text = f"""
-        <b>Export Date:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>
-        <b>Total Medicines:</b> {statistics['total_medicines']}<br/>
-        <b>Filters Applied:</b> {filter_text}
-        """
-        elements.append(Paragraph(info_text, styles['Normal']))
+        mfr_table = Table(mfr_data, colWidths=[4*inch, 1.5*inch])
+        mfr_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        elements.append(mfr_table)
         elements.append(Spacer(1, 20))
+    
+    if statistics.get('classification_distribution'):
+        elements.append(Paragraph("<b>Classification Distribution</b>", styles['Heading3']))
+        cls_data = [['Classification', 'Count']]
+        for cls, count in statistics['classification_distribution'].items():
+            cls_data.append([cls, count])
         
-        elements.append(Paragraph("Summary Statistics", heading_style))
+        cls_table = Table(cls_data, colWidths=[4*inch, 1.5*inch])
+        cls_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        elements.append(cls_table)
+        elements.append(Spacer(1, 20))
+    
+    if medicines and len(medicines) > 0:
+        elements.append(PageBreak())
+        elements.append(Paragraph("Medicine Data", heading_style))
         elements.append(Spacer(1, 12))
         
-        if statistics['top_5_categories']:
-            elements.append(Paragraph("<b>Top 5 Categories</b>", styles['Heading3']))
-            cat_data = [['Category', 'Count']]
-            cat_data.extend(statistics['top_5_categories'])
-            
-            cat_table = Table(cat_data, colWidths=[4*inch, 1.5*inch])
-            cat_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(cat_table)
-            elements.append(Spacer(1, 20))
-        
-        if statistics['top_5_manufacturers']:
-            elements.append(Paragraph("<b>Top 5 Manufacturers</b>", styles['Heading3']))
-            mfr_data = [['Manufacturer', 'Medicines Count']]
-            mfr_data.extend(statistics['top_5_manufacturers'])
-            
-            mfr_table = Table(mfr_data, colWidths=[4*inch, 1.5*inch])
-            mfr_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(mfr_table)
-            elements.append(Spacer(1, 20))
-        
-        if statistics.get('classification_distribution'):
-            elements.append(Paragraph("<b>Classification Distribution</b>", styles['Heading3']))
-            cls_data = [['Classification', 'Count']]
-            for cls, count in statistics['classification_distribution'].items():
-                cls_data.append([cls, count])
-            
-            cls_table = Table(cls_data, colWidths=[4*inch, 1.5*inch])
-            cls_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(cls_table)
-            elements.append(Spacer(1, 20))
-        
-        if medicines and len(medicines) > 0:
-            elements.append(PageBreak())
-            elements.append(Paragraph("Medicine Data", heading_style))
-            elements.append(Spacer(1, 12))
-            
-            table_data = [['Name', 'Category', 'Manufacturer', 'Classification']]
-            for med in medicines:
-                table_data.append([
-                    str(med.get('medicine_name', 'N/A'))[:30],
-                    str(med.get('category', 'N/A'))[:20],
-                    str(med.get('manufacturer', 'N/A'))[:20],
-                    str(med.get('classification', 'N/A'))
-                ])
-            
-            data_table = Table(table_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.2*inch])
-            data_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.95, 0.95, 0.95)])
-            ]))
-            elements.append(data_table)
+        table_data = [['Name', 'Category', 'Manufacturer', 'Classification']]
+        for med in medicines:
+            table_data.append([
+                str(med.get('medicine_name', 'N/A'))[:30],
+                str(med.get('category', 'N/A'))[:20],
+                str(med.get('manufacturer', 'N/A'))[:20],
+                str(med.get('classification', 'N/A'))
+            ])
         
-        doc.build(elements)
-        
-        buffer.seek(0)
-        filename = f"medicine_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        
-        return StreamingResponse(
-            buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        data_table = Table(table_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.2*inch])
+        data_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.95, 0.95, 0.95)])
+        ]))
+        elements.append(data_table)
+    
+    doc.build(elements)
+    
+    return buffer.getvalue()
+
+def _iter_file(f, start: int, length: int, chunk_size: int = 64 * 1024):
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+def serve_report(f: BinaryIO, key: str, request: Request, headers: Dict[str, str] = None):
+    """Stream an open cached report, honouring If-None-Match, If-Range and a single byte Range. Closes f when done."""
+    size = os.fstat(f.fileno()).st_size
+    etag = f'"{key}"'
+    filename = f"medicine_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "X-Report-Key": key,
+        **(headers or {})
+    }
+    
+    # Reports are content addressed, so a matching tag means the client already has these bytes.
+    if_none_match = request.headers.get("if-none-match", "")
+    if request.method in ("GET", "HEAD") and (
+        if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+    ):
+        f.close()
+        return Response(status_code=304, headers={k: headers[k] for k in ("ETag", "X-Report-Key", "Accept-Ranges")})
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        range_header = None
+    
+    start, end, status_code = 0, size - 1, 200
+    if range_header:
+        try:
+            byte_range = report_cache.parse_range(range_header, size)
+        except ValueError:
+            f.close()
+            raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                                headers={"Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    
+    return StreamingResponse(
+        _iter_file(f, start, end - start + 1),
+        status_code=status_code,
+        media_type="application/pdf",
+        headers=headers
+    )
+
+def get_or_build_report(
+    filters: Dict[str, Any],
+    include_details: bool,
+    include_charts: bool,
+    chart_images: Optional[List[str]]
+) -> Tuple[str, BinaryIO, str]:
+    """Return (key, open report file, cache status), rendering the report on a cache miss."""
+    # The key and the report must come from the same filters, or two requests
+    # returning different rows could share a cache entry.
+    filters = report_cache.normalize_filters(filters)
+    key = report_cache.report_key(filters, include_details, include_charts, chart_images, report_cache.catalog_version())
+    report = report_cache.get_report(key)
+    if report is not None:
+        return key, report, "HIT"
+    
+    medicines = get_filtered_medicines(filters)
+    statistics = generate_statistics(medicines, filters)
+    report = report_cache.store_report(key, build_pdf_report(medicines, statistics, filters))
+    return key, report, "MISS"
+
+@router.post("/pdf", dependencies=[Depends(admit("export"))])
+async def export_to_pdf(
+    request: Request,
+    filters: Dict[str, Any] = {},
+    include_details: bool = Query(False),
+    include_charts: bool = Query(True),
+    chart_images: Optional[List[str]] = None
+):
+    try:
+        # Database work and PDF rendering block, so keep them off the event loop.
+        key, report, cache_status = await run_in_threadpool(
+            get_or_build_report, filters, include_details, include_charts, chart_images
         )
+        return serve_report(report, key, request, {"X-Cache": cache_status})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting to PDF: {str(e)}")
+
+@router.get("/reports/{key}", dependencies=[Depends(admit("export"))])
+def download_cached_report(key: str, request: Request):
+    """Re-download a previously generated report by its X-Report-Key."""
+    if not re.fullmatch(r"[0-9a-f]{64}", key):
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    report = report_cache.get_report(key)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    return serve_report(report, key, request, {"X-Cache": "HIT"})
+
+@router.get("/cache/stats")
+def get_report_cache_stats():
+    return report_cache.cache_stats()
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from database import get_cursor
+from admission import admit
 
 router = APIRouter()
 
-@router.get("/categories/distribution")
-async def get_category_distribution():
+@router.get("/categories/distribution", dependencies=[Depends(admit("aggregate"))])
+def get_category_distribution():
     try:
         with get_cursor() as cursor:
             cursor.execute("""
@@ -18,11 +19,13 @@ async def get_category_distribution():
                 ORDER BY count DESC
             """)
             return {"data": cursor.fetchall()}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/categories/classification")
-async def get_category_by_classification():
+@router.get("/categories/classification", dependencies=[Depends(admit("aggregate"))])
+def get_category_by_classification():
     try:
         with get_cursor() as cursor:
             cursor.execute("""
@@ -45,11 +48,13 @@ async def get_category_by_classification():
                 categories[cat][row["classification"]] = row["count"]
             
             return {"data": list(categories.values())}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/categories/{category_name}")
-async def get_category_details(category_name: str):
+@router.get("/categories/{category_name}", dependencies=[Depends(admit("aggregate"))])
+def get_category_details(category_name: str):
     try:
         with get_cursor() as cursor:
             cursor.execute("""
@@ -100,8 +105,8 @@ async def get_category_details(category_name: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/manufacturers/ranking")
-async def get_manufacturer_ranking(limit: int = Query(default=10, ge=1, le=50)):
+@router.get("/manufacturers/ranking", dependencies=[Depends(admit("aggregate"))])
+def get_manufacturer_ranking(limit: int = Query(default=10, ge=1, le=50)):
     try:
         with get_cursor() as cursor:
             cursor.execute("""
@@ -117,11 +122,13 @@ async def get_manufacturer_ranking(limit: int = Query(default=10, ge=1, le=50)):
                 LIMIT %s
             """, (limit,))
             return {"data": cursor.fetchall()}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/manufacturers/{manufacturer_name}")
-async def get_manufacturer_details(manufacturer_name: str):
+@router.get("/manufacturers/{manufacturer_name}", dependencies=[Depends(admit("aggregate"))])
+def get_manufacturer_details(manufacturer_name: str):
     try:
         with get_cursor() as cursor:
             cursor.execute("""
@@ -169,8 +176,8 @@ async def get_manufacturer_details(manufacturer_name: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/overview")
-async def get_insights_overview():
+@router.get("/overview", dependencies=[Depends(admit("aggregate"))])
+def get_insights_overview():
     try:
         with get_cursor() as cursor:
             cursor.execute("SELECT COUNT(*) AS count FROM medicine")
@@ -217,5 +224,7 @@ async def get_insights_overview():
                 "top_category": top_category,
                 "top_manufacturer": top_manufacturer
             }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from database import get_cursor
+from admission import admit
+from strength import parse_strength, strength_range, strength_range_sql
+import json
 
 router = APIRouter()
 
+# Interactive search shares the lookup slots; bulk reads belong on /all.
+SEARCH_LIMIT_MAX = 500
+
 class MedicineCreate(BaseModel):
     name: str
     strength: str
@@ -23,12 +30,15 @@ class MedicineUpdate(BaseModel):
     indication: Optional[str] = None
     classification: Optional[str] = None
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(admit("lookup"))])
 def search_medicines(
     q: Optional[str] = Query(None),
     manufacturer: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
-    limit: int = 50
+    min_strength: Optional[float] = Query(None),
+    max_strength: Optional[float] = Query(None),
+    unit: Optional[str] = Query(None, description="Unit for min/max_strength, e.g. mg, g, mcg, mL, mg/mL (default mg)"),
+    limit: int = Query(default=50, ge=1, le=SEARCH_LIMIT_MAX)
 ):
     where = []
     params = {}
@@ -45,6 +55,11 @@ def search_medicines(
         where.append("c.name ILIKE %(category)s")
         params["category"] = f"%{category}%"
 
+    try:
+        where.extend(strength_range_sql("m", strength_range(min_strength, max_strength, unit), params))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid strength filter: {str(e)}")
+
     where_sql = "WHERE " + " AND ".join(where) if where else ""
 
     sql = f"""
@@ -54,6 +69,8 @@ def search_medicines(
             m.indication,
             m.dosage_form,
             m.strength,
+            m.strength_value,
+            m.strength_unit,
             m.classification,
             ma.name AS manufacturer_name,
             c.name AS category_name
@@ -71,7 +88,7 @@ def search_medicines(
         cur.execute(sql, params)
         return {"results": cur.fetchall()}
 
-@router.get("/filters")
+@router.get("/filters", dependencies=[Depends(admit("aggregate"))])
 def get_filter_options():
     with get_cursor() as cur:
         cur.execute("SELECT manufacturer_id, name FROM manufacturer ORDER BY name")
@@ -93,8 +110,8 @@ def get_filter_options():
             "classifications": classifications
         }
 
-@router.get("/all")
-def get_all_medicines(limit: int = 1000):
+@router.get("/all", dependencies=[Depends(admit("aggregate"))])
+def get_all_medicines(limit: int = Query(default=1000, ge=1, le=10000)):
     sql = """
         SELECT
             m.medicine_id,
@@ -116,7 +133,120 @@ def get_all_medicines(limit: int = 1000):
         cur.execute(sql, (limit,))
         return {"results": cur.fetchall()}
 
-@router.get("/{medicine_id}")
+def current_change_version() -> int:
+    with get_cursor() as cur:
+        cur.execute("SELECT COALESCE(MAX(version), 0) AS version FROM medicine_change")
+        return cur.fetchone()["version"]
+
+def _json_number(value):
+    # NUMERIC columns arrive as Decimal, which json.dumps cannot encode.
+    return float(value) if value is not None else None
+
+def iter_changes(since: int, until: int, batch_size: int):
+    """Yield the latest change per medicine in (since, until], in version order, a batch at a time."""
+    sql_batch = """
+        SELECT
+            ch.version,
+            ch.medicine_id,
+            ch.changed_at,
+            m.medicine_id IS NULL AS deleted,
+            m.name,
+            m.indication,
+            m.dosage_form,
+            m.strength,
+            m.strength_value,
+            m.strength_unit,
+            m.classification,
+            m.manufacturer_id,
+            m.category_id,
+            ma.name AS manufacturer_name,
+            c.name AS category_name
+        FROM medicine_change ch
+        LEFT JOIN medicine m ON m.medicine_id = ch.medicine_id
+        LEFT JOIN manufacturer ma ON ma.manufacturer_id = m.manufacturer_id
+        LEFT JOIN category c ON c.category_id = m.category_id
+        WHERE ch.version > %(after)s
+          AND ch.version <= %(until)s
+          AND NOT EXISTS (
+              SELECT 1 FROM medicine_change later
+              WHERE later.medicine_id = ch.medicine_id
+                AND later.version > ch.version
+                AND later.version <= %(until)s
+          )
+        ORDER BY ch.version
+        LIMIT %(batch_size)s;
+    """
+
+    sql_ing = """
+        SELECT
+            mi.medicine_id,
+            i.name,
+            mi.strength,
+            mi.strength_value,
+            mi.strength_unit
+        FROM medicine_ingredient mi
+        JOIN ingredient i ON i.ingredient_id = mi.ingredient_id
+        WHERE mi.medicine_id = ANY(%(ids)s);
+    """
+
+    after = since
+    while after < until:
+        with get_cursor() as cur:
+            cur.execute(sql_batch, {"after": after, "until": until, "batch_size": batch_size})
+            rows = cur.fetchall()
+            if not rows:
+                return
+
+            ingredients = {}
+            ids = [row["medicine_id"] for row in rows if not row["deleted"]]
+            if ids:
+                cur.execute(sql_ing, {"ids": ids})
+                for ing in cur.fetchall():
+                    ing["strength_value"] = _json_number(ing["strength_value"])
+                    ingredients.setdefault(ing.pop("medicine_id"), []).append(ing)
+
+        for row in rows:
+            version = row.pop("version")
+            changed_at = row.pop("changed_at")
+            deleted = row.pop("deleted")
+            change = {
+                "version": version,
+                "medicine_id": row["medicine_id"],
+                "operation": "delete" if deleted else "upsert",
+                "changed_at": changed_at.isoformat(),
+            }
+            if not deleted:
+                row["strength_value"] = _json_number(row["strength_value"])
+                row["ingredients"] = ingredients.get(row["medicine_id"], [])
+                change["medicine"] = row
+            after = version
+            yield change
+
+@router.get("/changes", dependencies=[Depends(admit("sync"))])
+def get_changes(
+    since: int = Query(default=0, ge=0),
+    batch_size: int = Query(default=1000, ge=1, le=10000)
+):
+    """Stream medicines changed after `since` as NDJSON.
+
+    The stream ends with {"version": <head>, "complete": true}. Resume the next
+    sync from the version on the last line received; if the stream was cut off
+    before the final line, that is the last change applied.
+    """
+    until = current_change_version()
+
+    def stream():
+        for change in iter_changes(since, until, batch_size):
+            yield json.dumps(change) + "\n"
+        yield json.dumps({"version": max(since, until), "complete": True}) + "\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Change-Version": str(until)}
+    )
+
+@router.get("/{medicine_id}", dependencies=[Depends(admit("lookup"))])
 def get_medicine(medicine_id: int):
     sql_main = """
         SELECT
@@ -158,19 +288,22 @@ def get_medicine(medicine_id: int):
 
     return med
 
-@router.post("/")
+@router.post("/", dependencies=[Depends(admit("lookup"))])
 def create_medicine(medicine: MedicineCreate):
     """Insert a new medicine into the database."""
     sql = """
-        INSERT INTO medicine (name, strength, category_id, manufacturer_id, dosage_form, indication, classification)
-        VALUES (%(name)s, %(strength)s, %(category_id)s, %(manufacturer_id)s, %(dosage_form)s, %(indication)s, %(classification)s)
+        INSERT INTO medicine (name, strength, strength_value, strength_unit, category_id, manufacturer_id, dosage_form, indication, classification)
+        VALUES (%(name)s, %(strength)s, %(strength_value)s, %(strength_unit)s, %(category_id)s, %(manufacturer_id)s, %(dosage_form)s, %(indication)s, %(classification)s)
         RETURNING medicine_id;
     """
+    strength_value, strength_unit = parse_strength(medicine.strength) or (None, None)
     
     with get_cursor() as cur:
         cur.execute(sql, {
             "name": medicine.name,
             "strength": medicine.strength,
+            "strength_value": strength_value,
+            "strength_unit": strength_unit,
             "category_id": medicine.category_id,
             "manufacturer_id": medicine.manufacturer_id,
             "dosage_form": medicine.dosage_form,
@@ -181,7 +314,7 @@ def create_medicine(medicine: MedicineCreate):
         
     return {"message": "Medicine created successfully", "medicine_id": result["medicine_id"]}
 
-@router.put("/{medicine_id}")
+@router.put("/{medicine_id}", dependencies=[Depends(admit("lookup"))])
 def update_medicine(medicine_id: int, medicine: MedicineUpdate):
     """Update an existing medicine."""
     with get_cursor() as cur:
@@ -198,6 +331,9 @@ def update_medicine(medicine_id: int, medicine: MedicineUpdate):
         if medicine.strength is not None:
             updates.append("strength = %(strength)s")
             params["strength"] = medicine.strength
+            updates.append("strength_value = %(strength_value)s")
+            updates.append("strength_unit = %(strength_unit)s")
+            params["strength_value"], params["strength_unit"] = parse_strength(medicine.strength) or (None, None)
         if medicine.category_id is not None:
             updates.append("category_id = %(category_id)s")
             params["category_id"] = medicine.category_id
@@ -222,7 +358,7 @@ def update_medicine(medicine_id: int, medicine: MedicineUpdate):
         
     return {"message": "Medicine updated successfully"}
 
-@router.delete("/{medicine_id}")
+@router.delete("/{medicine_id}", dependencies=[Depends(admit("lookup"))])
 def delete_medicine(medicine_id: int):
     """Delete a medicine from the database."""
     with get_cursor() as cur:
@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ASSET_DIRS = ("css", "js")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+_assets: Dict[str, dict] = {}
+_manifest: Dict[str, str] = {}
+_index: Optional[dict] = None
+
+
+def _build_entry(content: bytes, content_type: str, immutable: bool) -> dict:
+    digest = hashlib.sha256(content).hexdigest()
+    variants = {"identity": content}
+
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(compressed) < len(content):
+        variants["gzip"] = compressed
+    if brotli is not None:
+        compressed = brotli.compress(content, quality=11)
+        if len(compressed) < len(content):
+            variants["br"] = compressed
+
+    return {
+        "digest": digest,
+        "content_type": content_type,
+        "immutable": immutable,
+        "variants": variants,
+    }
+
+
+def build_assets(frontend_path: str):
+    """Fingerprint, precompress and register the frontend assets and index.html."""
+    global _index
+    _assets.clear()
+    _manifest.clear()
+
+    for directory in ASSET_DIRS:
+        asset_dir = os.path.join(frontend_path, directory)
+        for filename in sorted(os.listdir(asset_dir)):
+            path = os.path.join(asset_dir, filename)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                content = f.read()
+
+            content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            # Starlette appends the charset itself for text/* media types.
+            if content_type.endswith("javascript") and not content_type.startswith("text/"):
+                content_type += "; charset=utf-8"
+
+            url = f"/{directory}/{filename}"
+            entry = _build_entry(content, content_type, immutable=False)
+            stem, ext = os.path.splitext(filename)
+            hashed_url = f"/{directory}/{stem}.{entry['digest'][:12]}{ext}"
+
+            _assets[url] = entry
+            _assets[hashed_url] = {**entry, "immutable": True}
+            _manifest[url] = hashed_url
+
+    with open(os.path.join(frontend_path, "index.html"), "r", encoding="utf-8") as f:
+        html = f.read()
+    for url, hashed_url in _manifest.items():
+        html = html.replace(f'"{url}"', f'"{hashed_url}"')
+    _index = _build_entry(html.encode("utf-8"), "text/html", immutable=False)
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        pieces = part.strip().split(";")
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def _negotiate(entry: dict, accept_encoding: str) -> str:
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if encoding in entry["variants"] and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return "identity"
+
+
+def _respond(entry: dict, request: Request) -> Response:
+    encoding = _negotiate(entry, request.headers.get("accept-encoding", ""))
+    etag = f'"{entry["digest"][:16]}-{encoding}"'
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if entry["immutable"] else REVALIDATE_CACHE_CONTROL,
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+    }
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=entry["variants"][encoding],
+        media_type=entry["content_type"],
+        headers=headers
+    )
+
+
+def asset_response(url: str, request: Request) -> Response:
+    entry = _assets.get(url)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return _respond(entry, request)
+
+
+def index_response(request: Request) -> Response:
+    return _respond(_index, request)
@@ -0,0 +1,203 @@
+"""Normalization of free-text strengths such as "500 mg" or "250 mg/5 ml".
+
+Strengths are stored alongside the original text as a numeric value in a
+canonical unit (mg, mL, mg/mL, mg/g, IU, IU/mL, mEq, mEq/mL or %), so dose
+ranges can be served by an index on (strength_unit, strength_value).
+
+Usage:
+    python strength.py --backfill    # normalize existing medicine and ingredient rows
+"""
+import argparse
+import re
+import sys
+from typing import Optional, Tuple
+
+# unit -> (canonical unit, factor to convert into it)
+MASS_UNITS = {
+    "kg": 1000000, "g": 1000, "gm": 1000, "gram": 1000, "grams": 1000,
+    "mg": 1, "mcg": 0.001, "µg": 0.001, "μg": 0.001, "ug": 0.001, "ng": 0.000001,
+}
+VOLUME_UNITS = {"l": 1000, "ml": 1}
+OTHER_UNITS = {
+    "iu": "IU", "u": "IU", "unit": "IU", "units": "IU",
+    "meq": "mEq", "%": "%",
+}
+
+_STRENGTH_RE = re.compile(
+    r"(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:[.,]\d+)?)\s*([a-zµμ%]+)(?:\s*/\s*(\d+(?:\.\d+)?)?\s*([a-zµμ]+))?",
+    re.IGNORECASE
+)
+_THOUSANDS_RE = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+
+# Stored and queried values are rounded alike so range bounds compare exactly.
+PRECISION = 6
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _unit(unit: str) -> Optional[Tuple[str, float]]:
+    unit = unit.lower()
+    if unit in MASS_UNITS:
+        return "mg", MASS_UNITS[unit]
+    if unit in VOLUME_UNITS:
+        return "mL", VOLUME_UNITS[unit]
+    if unit in OTHER_UNITS:
+        return OTHER_UNITS[unit], 1
+    return None
+
+
+def parse_strength(text: Optional[str], strict: bool = False) -> Optional[Tuple[float, str]]:
+    """Parse a strength into (value, canonical unit), or None if it is not understood.
+
+    Trailing text such as "500 mg film-coated" is ignored unless strict is set.
+    A mass per unit mass without an amount ("5 mg/g") is a concentration in
+    mg/g; combination strengths like "500 mg/125 mg" use the first component.
+    """
+    if not text:
+        return None
+    text = text.strip()
+    match = _STRENGTH_RE.fullmatch(text) if strict else _STRENGTH_RE.match(text)
+    if not match:
+        return None
+
+    number = match.group(1)
+    # "1,500 mg" and "1,000,000 IU" use thousands separators; "1,5 mg" is a decimal comma.
+    if _THOUSANDS_RE.fullmatch(number):
+        number = number.replace(",", "")
+    value = float(number.replace(",", "."))
+    unit = _unit(match.group(2))
+    if unit is None:
+        return None
+    canonical, factor = unit
+    value *= factor
+
+    per_amount, per_unit = match.group(3), match.group(4)
+    if per_unit:
+        per = _unit(per_unit)
+        if per is None:
+            return None
+        per_canonical, per_factor = per
+        if per_canonical == "mL" and canonical in ("mg", "IU", "mEq"):
+            volume = float(per_amount or 1) * per_factor
+            return round(value / volume, PRECISION), f"{canonical}/mL"
+        if per_canonical == "mg" and canonical == "mg" and per_amount is None:
+            return round(value / (per_factor / 1000), PRECISION), "mg/g"
+        if strict:
+            return None
+
+    return round(value, PRECISION), canonical
+
+
+def canonical_unit(unit: str) -> Tuple[str, float]:
+    """Canonical unit and conversion factor for a unit given in a query, e.g. "g" -> ("mg", 1000)."""
+    parsed = parse_strength(f"1 {unit}", strict=True)
+    if parsed is None:
+        raise ValueError(f"Unknown strength unit '{unit}'")
+    factor, canonical = parsed
+    return canonical, factor
+
+
+def strength_range(min_strength: Optional[float], max_strength: Optional[float], unit: Optional[str]):
+    """Convert a query range into (min, max, canonical unit), or None if no bound was given.
+
+    The unit and bounds are validated either way, so every caller rejects the
+    same input with ValueError.
+    """
+    canonical, factor = canonical_unit(unit or "mg")
+    for bound in (min_strength, max_strength):
+        if bound is not None and float(bound) < 0:
+            raise ValueError("Strength bounds must not be negative")
+    if min_strength is None and max_strength is None:
+        return None
+    return (
+        round(float(min_strength) * factor, PRECISION) if min_strength is not None else None,
+        round(float(max_strength) * factor, PRECISION) if max_strength is not None else None,
+        canonical
+    )
+
+
+def strength_range_sql(alias: str, bounds, params: dict) -> list:
+    """WHERE clauses for a strength_range() result, adding their parameters to params."""
+    if bounds is None:
+        return []
+    min_value, max_value, unit = bounds
+    where = [f"{alias}.strength_unit = %(strength_unit)s"]
+    params["strength_unit"] = unit
+    if min_value is not None:
+        where.append(f"{alias}.strength_value >= %(min_strength)s")
+        params["min_strength"] = min_value
+    if max_value is not None:
+        where.append(f"{alias}.strength_value <= %(max_strength)s")
+        params["max_strength"] = max_value
+    return where
+
+
+def _backfill_table(conn, table: str, key_columns: Tuple[str, ...]) -> int:
+    from psycopg2.extras import execute_values
+
+    keys = ", ".join(key_columns)
+    join = " AND ".join(f"t.{col} = v.{col}" for col in key_columns)
+    updated = 0
+    last_key = None
+
+    while True:
+        with conn.cursor() as cur:
+            if last_key is None:
+                cur.execute(f"SELECT {keys}, strength FROM {table} ORDER BY {keys} LIMIT %s", (BACKFILL_BATCH_SIZE,))
+            else:
+                cur.execute(
+                    f"SELECT {keys}, strength FROM {table} WHERE ({keys}) > %s ORDER BY {keys} LIMIT %s",
+                    (tuple(last_key), BACKFILL_BATCH_SIZE)
+                )
+            rows = cur.fetchall()
+            if not rows:
+                break
+
+            values = []
+            for row in rows:
+                parsed = parse_strength(row[-1])
+                values.append((*row[:-1], *(parsed or (None, None))))
+
+            execute_values(cur, f"""
+                UPDATE {table} t
+                SET strength_value = v.strength_value::numeric, strength_unit = v.strength_unit
+                FROM (VALUES %s) AS v ({keys}, strength_value, strength_unit)
+                WHERE {join}
+                  AND (t.strength_value IS DISTINCT FROM v.strength_value::numeric
+                       OR t.strength_unit IS DISTINCT FROM v.strength_unit)
+            """, values, page_size=len(values))
+            updated += cur.rowcount
+        conn.commit()
+        last_key = rows[-1][:-1]
+
+    return updated
+
+
+def backfill():
+    """Normalize strengths for every medicine and medicine_ingredient row, one batch per transaction."""
+    from database import get_connection
+
+    conn = get_connection()
+    try:
+        medicines = _backfill_table(conn, "medicine", ("medicine_id",))
+        ingredients = _backfill_table(conn, "medicine_ingredient", ("medicine_id", "ingredient_id"))
+    finally:
+        conn.close()
+    return {"medicine": medicines, "medicine_ingredient": ingredients}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Normalize medicine strengths.")
+    parser.add_argument("--backfill", action="store_true", help="parse and store strengths for existing rows")
+    args = parser.parse_args(argv)
+
+    if args.backfill:
+        for table, count in backfill().items():
+            print(f"{table}: {count} rows updated")
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
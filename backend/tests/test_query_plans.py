@@ -0,0 +1,46 @@
+"""Fail when a router query sequentially scans a large table.
+
+Needs a local, migrated Postgres (see database.DB_CONFIG); the module is
+skipped when none is reachable. Synthetic rows are seeded once, so run it
+against a development database only.
+"""
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from database import get_connection  # noqa: E402
+import plan_check  # noqa: E402
+
+SEED_MEDICINES = 50000
+# Tables with at least this many rows must not be sequentially scanned.
+MIN_ROWS = 10000
+
+
+@pytest.fixture(scope="session")
+def seeded_database():
+    try:
+        conn = get_connection()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"no local Postgres reachable: {e}")
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('public.medicine_change') IS NOT NULL")
+            if not cur.fetchone()[0]:
+                pytest.skip("database is not migrated; run python migrate.py")
+            cur.execute("SELECT COUNT(*) FROM medicine WHERE name LIKE 'Seed Medicine %'")
+            seeded = cur.fetchone()[0]
+        conn.rollback()
+    finally:
+        conn.close()
+
+    if not seeded:
+        plan_check.seed(SEED_MEDICINES)
+
+
+def test_no_sequential_scans_over_large_tables(seeded_database):
+    violations = plan_check.check(MIN_ROWS)
+    assert not violations, "\n".join(
+        f"{v['case']}: Seq Scan on {', '.join(v['tables'])}\n    {v['sql'][:200]}"
+        for v in violations
+    )
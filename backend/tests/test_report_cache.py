@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+import report_cache
+from report_cache import normalize_filters, parse_range, report_key
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=10-", (10, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    (" bytes=0-0 ", (0, 0)),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=0-1,5-6", "bytes=-", "items=0-5", "bytes=abc", "bytes=9-3"])
+def test_parse_range_ignores_unsupported_headers(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=2000-3000", "bytes=-0"])
+def test_parse_range_rejects_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+def test_normalize_filters_trims_and_drops_empty_values():
+    assert normalize_filters({"q": " aspirin ", "category": "", "manufacturer": None, "classification": "Prescription"}) == {
+        "q": "aspirin",
+        "classification": "Prescription",
+    }
+    assert normalize_filters(None) == {}
+
+
+def test_report_key_is_stable_across_equivalent_filters():
+    key = report_key({"q": "aspirin", "category": "Analgesic"}, False, True, None, "1:abc")
+    assert key == report_key({"category": "Analgesic ", "q": "aspirin", "manufacturer": ""}, False, True, [], "1:abc")
+
+
+@pytest.mark.parametrize("changed", [
+    dict(filters={"q": "ibuprofen"}),
+    dict(include_details=True),
+    dict(include_charts=False),
+    dict(chart_images=["data:image/png;base64,AAAA"]),
+    dict(data_version="2:abc"),
+])
+def test_report_key_changes_with_inputs(changed):
+    args = dict(filters={"q": "aspirin"}, include_details=False, include_charts=True, chart_images=None, data_version="1:abc")
+    assert report_key(**args) != report_key(**{**args, **changed})
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(report_cache.REPORT_CACHE_CONFIG, "directory", str(tmp_path))
+    monkeypatch.setitem(report_cache.REPORT_CACHE_CONFIG, "max_bytes", 250)
+    return tmp_path
+
+
+def _store(key, size, mtime):
+    report_cache.store_report(key, b"x" * size).close()
+    os.utime(report_cache.report_path(key), (mtime, mtime))
+
+
+def _cached_keys(directory):
+    return sorted(name[:-4] for name in os.listdir(directory) if name.endswith(".pdf"))
+
+
+def test_store_evicts_least_recently_used(cache_dir):
+    _store("a", 100, 1000)
+    _store("b", 100, 2000)
+    report_cache.store_report("c", b"x" * 100).close()
+    assert _cached_keys(cache_dir) == ["b", "c"]
+
+
+def test_get_report_refreshes_recency(cache_dir):
+    _store("a", 100, 1000)
+    _store("b", 100, 2000)
+    report_cache.get_report("a").close()
+    report_cache.store_report("c", b"x" * 100).close()
+    assert _cached_keys(cache_dir) == ["a", "c"]
+
+
+def test_store_keeps_new_report_even_when_over_limit(cache_dir):
+    _store("a", 100, 1000)
+    report = report_cache.store_report("big", b"x" * 500)
+    assert report.read() == b"x" * 500
+    report.close()
+    assert _cached_keys(cache_dir) == ["big"]
+
+
+def test_get_report_miss(cache_dir):
+    assert report_cache.get_report("missing") is None
@@ -0,0 +1,87 @@
+import pytest
+
+from strength import canonical_unit, parse_strength, strength_range, strength_range_sql
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("500 mg", (500.0, "mg")),
+    ("0.5g", (500.0, "mg")),
+    ("10mcg", (0.01, "mg")),
+    ("700 mcg", (0.7, "mg")),
+    ("1,5 mg", (1.5, "mg")),
+    ("1,500 mg", (1500.0, "mg")),
+    ("1,000,000 IU", (1000000.0, "IU")),
+    ("250 mg/5 ml", (50.0, "mg/mL")),
+    ("100 IU/ml", (100.0, "IU/mL")),
+    ("5 mg/g", (5.0, "mg/g")),
+    ("500mg/125mg", (500.0, "mg")),
+    ("2%", (2.0, "%")),
+    ("20 mEq", (20.0, "mEq")),
+    ("500 mg tablet", (500.0, "mg")),
+])
+def test_parse_strength(text, expected):
+    assert parse_strength(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "abc", "5 furlongs", "5 mg/xyz"])
+def test_parse_strength_rejects_unknown(text):
+    assert parse_strength(text) is None
+
+
+def test_parse_strength_strict_rejects_trailing_text():
+    assert parse_strength("500 mg tablet", strict=True) is None
+    assert parse_strength("500 mg", strict=True) == (500.0, "mg")
+
+
+@pytest.mark.parametrize("unit, expected", [
+    ("mg", ("mg", 1.0)),
+    ("g", ("mg", 1000.0)),
+    ("mcg", ("mg", 0.001)),
+    ("mg/mL", ("mg/mL", 1.0)),
+    ("g/L", ("mg/mL", 1.0)),
+])
+def test_canonical_unit(unit, expected):
+    assert canonical_unit(unit) == expected
+
+
+@pytest.mark.parametrize("unit", ["mg abc", "furlong", "mg/5mg"])
+def test_canonical_unit_rejects_unknown(unit):
+    with pytest.raises(ValueError):
+        canonical_unit(unit)
+
+
+def test_strength_range_matches_stored_value_at_boundary():
+    value, unit = parse_strength("700 mcg")
+    min_value, max_value, range_unit = strength_range(700, 700, "mcg")
+    assert range_unit == unit
+    assert min_value <= value <= max_value
+
+
+def test_strength_range_defaults_to_mg():
+    assert strength_range(100, None, None) == (100.0, None, "mg")
+
+
+def test_strength_range_without_bounds():
+    assert strength_range(None, None, "g") is None
+
+
+def test_strength_range_rejects_unknown_unit_without_bounds():
+    with pytest.raises(ValueError):
+        strength_range(None, None, "furlongs")
+
+
+@pytest.mark.parametrize("min_strength, max_strength", [(-1, None), (None, -0.5), (-10, 10)])
+def test_strength_range_rejects_negative_bounds(min_strength, max_strength):
+    with pytest.raises(ValueError):
+        strength_range(min_strength, max_strength, "mg")
+
+
+def test_strength_range_sql():
+    params = {}
+    where = strength_range_sql("m", strength_range(0.1, 0.2, "g"), params)
+    assert where == [
+        "m.strength_unit = %(strength_unit)s",
+        "m.strength_value >= %(min_strength)s",
+        "m.strength_value <= %(max_strength)s",
+    ]
+    assert params == {"strength_unit": "mg", "min_strength": 100.0, "max_strength": 200.0}
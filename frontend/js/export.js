@@ -170,15 +170,17 @@ async function updateExportPreview() {
         if (filters.category) params.append('category', filters.category);
         if (filters.manufacturer) params.append('manufacturer', filters.manufacturer);
         
-        const response = await fetch(`/api/medicines?${params.toString()}&limit=10000`);
+        const previewLimit = 500;
+        const response = await fetch(`/api/medicines?${params.toString()}&limit=${previewLimit}`);
         const data = await response.json();
         
         const count = data.results?.length || 0;
+        const countText = count >= previewLimit ? `${previewLimit.toLocaleString()}+` : count.toLocaleString();
         const filterDesc = Object.keys(filters).length > 0 
             ? `with current filters` 
             : `(no filters applied - all medicines)`;
         
-        previewDiv.innerHTML = `<strong>${count.toLocaleString()}</strong> medicines will be exported ${filterDesc}`;
+        previewDiv.innerHTML = `<strong>${countText}</strong> medicines will be exported ${filterDesc}`;
     } catch (error) {
         previewDiv.innerHTML = 'Unable to preview count';
     }